@@ -24,10 +24,9 @@ from __future__ import annotations
 
 import argparse
 import re
-from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from openpyxl import load_workbook
 from openpyxl import Workbook
@@ -109,8 +108,7 @@ def _as_int(v: Any) -> int:
     return 0
 
 
-@dataclass(frozen=True)
-class ReleaseRow:
+class ReleaseRow(NamedTuple):
     code: str          # Rel-19, R99, UMTS, Ph1...
     name: str          # Release 19, Release 1999, UMTS...
     status: str        # Open/Frozen/Closed
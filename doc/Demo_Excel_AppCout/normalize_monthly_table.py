@@ -28,6 +28,7 @@ from __future__ import annotations
 
 import argparse
 import csv
+import re
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
@@ -41,6 +42,12 @@ from openpyxl.utils import get_column_letter
 
 DateLike = Union[date, datetime]
 
+# "YYYY-MM-DD", "YYYY/MM/DD", "YYYY-MM", "YYYY/MM"（月・日は1桁も可、区切りは統一）
+_RE_MONTH = re.compile(r"^(\d{4})([-/])(\d{1,2})(?:\2(\d{1,2}))?$")
+
+_CSV_CHUNK_ROWS = 1000
+_CSV_BUFFER_SIZE = 1024 * 1024
+
 
 @dataclass(frozen=True)
 class Block:
@@ -69,14 +76,19 @@ def _parse_month_cell(v: object) -> Optional[date]:
         if not s:
             return None
 
-        fmts = ["%Y-%m-%d", "%Y/%m/%d", "%Y-%m", "%Y/%m"]
-        for fmt in fmts:
+        m = _RE_MONTH.match(s)
+        if m is None:
+            return None
+        y, mo = int(m.group(1)), int(m.group(3))
+        if y < 1 or not 1 <= mo <= 12:
+            return None
+        if m.group(4) is not None:
+            # 日付部分は月初に丸めるが、存在しない日付（2月30日など）は不正扱い
             try:
-                dt = datetime.strptime(s, fmt)
-                return date(dt.year, dt.month, 1)
+                date(y, mo, int(m.group(4)))
             except ValueError:
-                continue
-        return None
+                return None
+        return date(y, mo, 1)
 
     # 数値シリアル日付などは openpyxl が通常 datetime にしてくれるが、
     # 念のためここでは扱わない
@@ -206,6 +218,24 @@ def normalize_excel(
 
     months = _month_range(start_date, end_date)
 
+    # (month, company) -> count の dict を 月×企業 の密行列に展開
+    # （同名企業が複数ブロックにある場合は同じ合計値を各列へ入れる）
+    month_idx = {m: i for i, m in enumerate(months)}
+    comp_cols: Dict[str, List[int]] = {}
+    for j, comp in enumerate(companies):
+        comp_cols.setdefault(comp, []).append(j)
+
+    counts: List[List[int]] = [[0] * len(companies) for _ in months]
+    for (m, comp), v in agg.items():
+        i = month_idx.get(m)
+        if i is None:
+            continue
+        row_counts = counts[i]
+        for j in comp_cols[comp]:
+            row_counts[j] = v
+
+    month_iso = [m.isoformat() for m in months]
+
     # 出力ワークブック作成
     out_wb = Workbook()
     out_ws = out_wb.active
@@ -216,11 +246,8 @@ def normalize_excel(
     for cell in out_ws[1]:
         cell.font = Font(bold=True)
 
-    for m in months:
-        row = [m.isoformat()]
-        for comp in companies:
-            row.append(agg.get((m, comp), 0))
-        out_ws.append(row)
+    for i, m_iso in enumerate(month_iso):
+        out_ws.append([m_iso, *counts[i]])
 
     # 見やすさ調整
     out_ws.freeze_panes = "A2"
@@ -234,12 +261,13 @@ def normalize_excel(
     # CSVも欲しい場合
     if csv_out is not None:
         csv_out.parent.mkdir(parents=True, exist_ok=True)
-        with csv_out.open("w", encoding="utf-8", newline="") as f:
+        with csv_out.open("w", encoding="utf-8", newline="", buffering=_CSV_BUFFER_SIZE) as f:
             w = csv.writer(f, lineterminator="\n")
             w.writerow(header)
-            for m in months:
-                row = [m.isoformat()] + [agg.get((m, comp), 0) for comp in companies]
-                w.writerow(row)
+            # 1000行単位で writerows に渡す（行ごとの writerow 呼び出しを減らす）
+            for lo in range(0, len(months), _CSV_CHUNK_ROWS):
+                hi = min(lo + _CSV_CHUNK_ROWS, len(months))
+                w.writerows([[month_iso[i], *counts[i]] for i in range(lo, hi)])
 
 
 def main() -> int:
@@ -18,6 +18,7 @@ plot_lines_with_release_stems_sharedx.py
 
 依存:
   pip install pandas openpyxl matplotlib numpy
+  (任意) pip install python-calamine  # Excel読み込みの高速化
 """
 
 from __future__ import annotations
@@ -29,28 +30,70 @@ from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+# Agg は1本の線を 10000 点ずつに分けてラスタライズする（点数の多い月次折れ線で描画が詰まらないように）
+matplotlib.rcParams["agg.path.chunksize"] = 10000
 
 
 # ----------------------------
 # parsing / detection
 # ----------------------------
 
+_MONTH_RE = re.compile(r"(\d{4})-(\d{2})")
+
+
 def parse_month_series(s: pd.Series) -> pd.Series:
     """'YYYY-MM-..' / datetime / 'YYYY-MM-DD (SA#..)' を月初 datetime に正規化"""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        # 既に datetime 列なら文字列パースは不要
+        return s.dt.to_period("M").dt.to_timestamp()
+
     dt = pd.to_datetime(s, errors="coerce")
     mask = dt.isna() & s.notna()
     if mask.any():
         xs = s[mask].astype(str).str.strip()
-        m = xs.str.extract(r"(\d{4})-(\d{2})", expand=True)
+        m = xs.str.extract(_MONTH_RE, expand=True)
         year = pd.to_numeric(m[0], errors="coerce")
         month = pd.to_numeric(m[1], errors="coerce")
-        dt2 = pd.to_datetime(dict(year=year, month=month, day=1), errors="coerce")
-        dt.loc[mask] = dt2
+        ym = (year * 100 + month).astype("Int64").astype("string")
+        dt.loc[mask] = pd.to_datetime(ym, format="%Y%m", errors="coerce")
     return dt.dt.to_period("M").dt.to_timestamp()
 
 
+def _read_excel(path: Path, sheet: str, **kwargs) -> pd.DataFrame:
+    """
+    python-calamine があれば calamine エンジン、無ければ openpyxl エンジン（read_only / data_only）で読む。
+    どちらも pandas が読むので、列名の付き方（Unnamed: N / 重複の .1 など）は同じ。
+    """
+    try:
+        return pd.read_excel(path, sheet_name=sheet, engine="calamine", **kwargs)
+    except ImportError:  # python-calamine 未導入
+        pass
+    except ValueError as e:  # pandas < 2.2 は engine="calamine" を知らない
+        if not str(e).startswith("Unknown engine"):
+            raise
+    return pd.read_excel(path, sheet_name=sheet, engine="openpyxl", **kwargs)
+
+
+def read_sheet(path: Path, sheet: str, usecols: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    シートを DataFrame で読む。usecols（列位置）を渡すとその列だけ読む。
+    """
+    return _read_excel(path, sheet, usecols=usecols)
+
+
+def read_sheet_header(path: Path, sheet: str) -> List[str]:
+    """
+    シートの列名（1行目）だけを読む。列名は read_sheet と同じ規則で付く。
+    """
+    return [str(c) for c in _read_excel(path, sheet, nrows=0).columns]
+
+
 def find_date_col(df: pd.DataFrame) -> str:
     for cand in ["年月", "month", "Month", "date", "Date"]:
         if cand in df.columns:
@@ -62,8 +105,11 @@ def detect_release_active_cols(df: pd.DataFrame) -> List[str]:
     return [c for c in df.columns if isinstance(c, str) and c.endswith("_ACTIVE")]
 
 
-def detect_company_cols_by_layout(df: pd.DataFrame, date_col: str) -> List[str]:
-    cols = list(df.columns)
+def company_cols_by_name(cols: List[str], date_col: str) -> Optional[List[str]]:
+    """
+    列名だけで企業列（日付列の次〜Release系の列の手前）を決める。
+    区切りになる列が無ければ None（値を見ないと決められない）。
+    """
     i0 = cols.index(date_col)
 
     stop_names = {
@@ -71,30 +117,27 @@ def detect_company_cols_by_layout(df: pd.DataFrame, date_col: str) -> List[str]:
         "FF_Releases", "PS_Releases", "Window_Releases",
     }
 
-    stop_idx: Optional[int] = None
     for j in range(i0 + 1, len(cols)):
         c = cols[j]
         if c in stop_names:
-            stop_idx = j
-            break
+            return cols[i0 + 1:j]
         if isinstance(c, str) and re.search(r"_(ACTIVE|START|END)$", c):
-            stop_idx = j
-            break
+            return cols[i0 + 1:j]
+    return None
 
-    if stop_idx is None:
-        # fallback: 数値列っぽいもの（0/1のみは除外）
-        out = []
-        for c in cols[i0 + 1:]:
-            v = pd.to_numeric(df[c], errors="coerce")
-            if v.notna().sum() == 0:
-                continue
-            uniq = set(v.dropna().astype(float).unique().tolist())
-            if uniq.issubset({0.0, 1.0}):
-                continue
-            out.append(c)
-        return out
 
-    return [c for c in cols[i0 + 1:stop_idx]]
+def detect_company_cols_by_layout(df: pd.DataFrame, date_col: str) -> List[str]:
+    cols = list(df.columns)
+    by_name = company_cols_by_name(cols, date_col)
+    if by_name is not None:
+        return by_name
+
+    # fallback: 数値列っぽいもの（0/1のみは除外）
+    cands = cols[cols.index(date_col) + 1:]
+    num = df[cands].apply(pd.to_numeric, errors="coerce")
+    nonnull = num.notna().any().to_numpy()
+    is_flag = (num.isin([0.0, 1.0]) | num.isna()).all().to_numpy()
+    return [c for c, keep in zip(cands, nonnull & ~is_flag) if keep]
 
 
 # ----------------------------
@@ -111,14 +154,6 @@ def release_rank(code: str) -> int:
     return 0
 
 
-def count_blocks(indices: np.ndarray) -> int:
-    """ACTIVE=1 が連続ブロック何個あるか（途切れ検出用）"""
-    if indices.size == 0:
-        return 0
-    gaps = np.where(np.diff(indices) > 1)[0]
-    return int(gaps.size + 1)
-
-
 def infer_release_pairs(
     df: pd.DataFrame,
     months: pd.Series,
@@ -127,45 +162,49 @@ def infer_release_pairs(
     """
     *_ACTIVE 列から releaseごとに start/end（月）を作る。
     ついでに contiguity(途切れ) もチェック。
+    全 ACTIVE 列を 月×release の 0/1 行列にして、列方向にまとめて計算する。
     """
-    rows = []
-    for col in active_cols:
-        code = col[:-7]  # drop "_ACTIVE"
-        v = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int).to_numpy()
-        idx = np.where(v == 1)[0]
-
-        if idx.size == 0:
-            rows.append({
-                "release": code,
-                "has_active": False,
-                "start_month": "",
-                "end_month": "",
-                "blocks": 0,
-                "note": "ACTIVE has no 1s",
-            })
-            continue
-
-        b = count_blocks(idx)
-        st = months.iloc[int(idx[0])]
-        ed = months.iloc[int(idx[-1])]
-        rows.append({
-            "release": code,
-            "has_active": True,
-            "start_month": st,
-            "end_month": ed,
-            "blocks": b,
-            "note": "OK" if b == 1 else "ACTIVE has gaps (non-contiguous)",
-        })
-
-    out = pd.DataFrame(rows)
-    # 見やすく start順→rank順
-    def _key(r):
-        if not r["has_active"]:
-            return (pd.Timestamp.max, 10**9)
-        return (r["start_month"], -release_rank(r["release"]))
-    out = out.sort_values(by=["has_active"], ascending=[False]).copy()
-    out["_sort"] = out.apply(_key, axis=1)
-    out = out.sort_values(by="_sort").drop(columns=["_sort"])
+    num = df[active_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    M = (np.trunc(num) == 1).astype(np.int8)
+    n_months, n_rel = M.shape
+
+    has_active = M.any(axis=0)
+
+    # 立ち上がり(0->1)の数 = ACTIVE=1 の連続ブロック数（途切れ検出用）
+    pad = np.zeros((1, n_rel), dtype=np.int8)
+    blocks = (np.diff(np.vstack([pad, M, pad]), axis=0) == 1).sum(axis=0)
+
+    if n_months:
+        first = M.argmax(axis=0)
+        last = (n_months - 1) - M[::-1].argmax(axis=0)
+        month_vals = months.to_numpy(dtype=object)
+        start_month = np.where(has_active, month_vals[first], "")
+        end_month = np.where(has_active, month_vals[last], "")
+    else:
+        start_month = end_month = np.full(n_rel, "", dtype=object)
+
+    note = np.where(
+        ~has_active, "ACTIVE has no 1s",
+        np.where(blocks == 1, "OK", "ACTIVE has gaps (non-contiguous)"),
+    )
+
+    out = pd.DataFrame({
+        "release": [c[:-7] for c in active_cols],  # drop "_ACTIVE"
+        "has_active": has_active,
+        "start_month": start_month,
+        "end_month": end_month,
+        "blocks": blocks.astype(int),
+        "note": note,
+    })
+    # 見やすく start順→rank順（ACTIVEなしは末尾、元の列順のまま）
+    out["_start"] = pd.to_datetime(out["start_month"].where(out["has_active"]))
+    out["_rank"] = out["release"].map(release_rank).where(out["has_active"], 0).astype(int)
+    out = out.sort_values(
+        by=["has_active", "_start", "_rank"],
+        ascending=[False, True, False],
+        na_position="last",
+        kind="mergesort",
+    ).drop(columns=["_start", "_rank"])
     return out
 
 
@@ -182,6 +221,51 @@ def build_event_levels(dates: List[pd.Timestamp], sign: float, base: float = 1.0
     return levels
 
 
+def stem_segments(x: np.ndarray, levels: List[float]) -> np.ndarray:
+    """
+    (x, 0) -> (x, level) の縦線を LineCollection 用の (N, 2, 2) 配列にする。
+    """
+    x = np.asarray(x, dtype=float)
+    n = x.size
+    bottom = np.column_stack([x, np.zeros(n)])
+    top = np.column_stack([x, np.asarray(levels, dtype=float)])
+    return np.stack([bottom, top], axis=1)
+
+
+# 月数がこれを超えたら上段の折れ線を LTTB で LTTB_POINTS 点に間引く
+LTTB_THRESHOLD = 5000
+LTTB_POINTS = 2000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets で (x, y) を n_out 点に間引く。
+    先頭・末尾は必ず残し、間の各バケットからは
+    「直前の採用点・次バケット平均」と作る三角形の面積が最大の点を採る。
+    """
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)  # n_out-2 個のバケット境界
+    idx = np.empty(n_out, dtype=int)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+
+    return x[idx], y[idx]
+
+
 # ----------------------------
 # style helpers
 # ----------------------------
@@ -214,10 +298,23 @@ def plot(
     ax_bot = fig.add_subplot(gs[1, 0], sharex=ax_top)
 
     # --- 上：折れ線（x軸表示なし、y軸表示あり）
-    for c in companies:
-        ax_top.plot(months, counts[c].to_numpy(dtype=float), linewidth=1.2, label=c)
+    # 企業ごとの Line2D ではなく LineCollection 1個で描き、凡例は proxy で作る
+    # x は date2num で1回だけ float 化し、軸側は xaxis_date で日付として扱わせる
+    xn = mdates.date2num(months.to_numpy())
+    ax_top.xaxis_date()
+    Y = counts[companies].to_numpy(dtype=np.float32).T
+    if len(xn) > LTTB_THRESHOLD:
+        # 点数が多いときは見た目を保ったまま間引く（企業ごとに選ばれる x が異なる）
+        segs = [np.column_stack(lttb(xn, y, LTTB_POINTS)) for y in Y]
+    else:
+        segs = np.stack([np.broadcast_to(xn, Y.shape), Y], axis=-1)
+    cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    colors = [cycle[i % len(cycle)] for i in range(len(companies))]
+    ax_top.add_collection(LineCollection(segs, linewidths=1.2, colors=colors, rasterized=True))
+    ax_top.autoscale_view()
 
-    ax_top.legend(loc="upper left", bbox_to_anchor=(1.01, 1.0), borderaxespad=0.0, fontsize=9)
+    handles = [Line2D([], [], color=col, linewidth=1.2, label=c) for c, col in zip(companies, colors)]
+    ax_top.legend(handles=handles, loc="upper left", bbox_to_anchor=(1.01, 1.0), borderaxespad=0.0, fontsize=9)
 
     # 上はx軸の表示を全部消す（ただしsharexは維持）
     ax_top.tick_params(axis="x", which="both", bottom=False, labelbottom=False)
@@ -252,44 +349,38 @@ def plot(
     start_levels = build_event_levels(start_dates, sign=+1.0)
     end_levels = build_event_levels(end_dates, sign=-1.0)
 
-    # stem + marker
-    ax_bot.vlines(start_dates, 0, start_levels, linewidth=1.0)
-    ax_bot.plot(start_dates, np.zeros(len(start_dates)), marker="^", linestyle="None",
-                markersize=4, markerfacecolor="white")
+    # stem + marker（stemは LineCollection 1個、markerは scatter 1回で描く）
+    # scatter を plot(marker=...) と同じ見た目にする（縁の太さ・画素へのスナップ・角の形）
+    marker_kw = dict(linewidths=plt.rcParams["lines.markeredgewidth"], snap=True, joinstyle="miter")
+    start_x = mdates.date2num(start_dates)
+    ax_bot.add_collection(LineCollection(stem_segments(start_x, start_levels), linewidths=1.0, colors="C0"))
+    ax_bot.scatter(start_x, np.zeros(len(start_x)), marker="^", s=16,
+                   facecolors="white", edgecolors="C0", zorder=3, **marker_kw)
 
     if show_end:
-        ax_bot.vlines(end_dates, 0, end_levels, linewidth=1.0, linestyles="--")
-        ax_bot.plot(end_dates, np.zeros(len(end_dates)), marker="v", linestyle="None",
-                    markersize=4, markerfacecolor="white")
+        end_x = mdates.date2num(end_dates)
+        ax_bot.add_collection(LineCollection(stem_segments(end_x, end_levels), linewidths=1.0,
+                                             colors="C0", linestyles="--"))
+        ax_bot.scatter(end_x, np.zeros(len(end_x)), marker="v", s=16,
+                       facecolors="white", edgecolors="C1", zorder=3, **marker_kw)
 
     # labels（重なり対策：回転＋bbox）
-    for (release, st, ed), lvl_s, lvl_e in zip(act[["release", "start_month", "end_month"]].itertuples(index=False, name=None),
-                                               start_levels, end_levels):
+    # 共通kwargsはループ外で1回だけ作る。x位置は stem と同じ数値座標を使う。
+    label_kw = dict(
+        textcoords="offset points",
+        ha="left",
+        rotation=label_rotation,
+        fontsize=8,
+        bbox=dict(boxstyle="square", pad=0.15, lw=0, fc=(1, 1, 1, 0.75)),
+    )
+    releases = act["release"].to_numpy()
+    for release, xs, lvl_s in zip(releases, start_x, start_levels):
         # Start label（上）
-        ax_bot.annotate(
-            f"{release}",
-            xy=(st, lvl_s),
-            xytext=(2, 3),
-            textcoords="offset points",
-            ha="left",
-            va="bottom",
-            rotation=label_rotation,
-            fontsize=8,
-            bbox=dict(boxstyle="square", pad=0.15, lw=0, fc=(1, 1, 1, 0.75)),
-        )
-        # End label（下）
-        if show_end:
-            ax_bot.annotate(
-                f"{release}",
-                xy=(ed, lvl_e),
-                xytext=(2, -3),
-                textcoords="offset points",
-                ha="left",
-                va="top",
-                rotation=label_rotation,
-                fontsize=8,
-                bbox=dict(boxstyle="square", pad=0.15, lw=0, fc=(1, 1, 1, 0.75)),
-            )
+        ax_bot.annotate(f"{release}", xy=(xs, lvl_s), xytext=(2, 3), va="bottom", **label_kw)
+    if show_end:
+        for release, xe, lvl_e in zip(releases, end_x, end_levels):
+            # End label（下）
+            ax_bot.annotate(f"{release}", xy=(xe, lvl_e), xytext=(2, -3), va="top", **label_kw)
 
     # timeline領域のy範囲を固定（見た目の安定）
     ax_bot.set_ylim(-3.0, 3.0)
@@ -315,15 +406,29 @@ def main() -> int:
     ap.add_argument("--audit-csv", default=None, help="release start/end 監査表をCSVで出力したい場合に指定")
     args = ap.parse_args()
 
-    df = pd.read_excel(Path(args.input), sheet_name=args.sheet, engine="openpyxl")
+    # 先に列名だけ読み、使う列（日付 / *_ACTIVE / 企業）を決めてから本読みする
+    header = [c.strip() for c in read_sheet_header(Path(args.input), args.sheet)]
+    header_df = pd.DataFrame(columns=header)
+    date_col = find_date_col(header_df)
+    active_cols = detect_release_active_cols(header_df)
+
+    if args.companies:
+        companies: Optional[List[str]] = [c.strip() for c in args.companies.split(",") if c.strip()]
+    else:
+        companies = company_cols_by_name(header, date_col)
+
+    usecols: Optional[List[int]] = None
+    if companies is not None:
+        keep = {date_col, *active_cols, *companies}
+        usecols = [i for i, c in enumerate(header) if c in keep]
+
+    df = read_sheet(Path(args.input), args.sheet, usecols=usecols)
     df.columns = [str(c).strip() for c in df.columns]
 
-    date_col = find_date_col(df)
     df["__month"] = parse_month_series(df[date_col])
     df = df[df["__month"].notna()].sort_values("__month").reset_index(drop=True)
     months = df["__month"]
 
-    active_cols = detect_release_active_cols(df)
     if not active_cols:
         raise SystemExit("[ERROR] Rel-xx_ACTIVE 列が見つかりません（timeline生成に必要）")
 
@@ -352,15 +457,13 @@ def main() -> int:
         outp = Path(args.audit_csv)
         tmp = pairs.copy()
         # datetimeを見やすく
-        tmp["start_month"] = tmp["start_month"].apply(lambda x: x.strftime("%Y-%m") if isinstance(x, pd.Timestamp) else x)
-        tmp["end_month"] = tmp["end_month"].apply(lambda x: x.strftime("%Y-%m") if isinstance(x, pd.Timestamp) else x)
+        for col in ("start_month", "end_month"):
+            tmp[col] = pd.to_datetime(tmp[col], errors="coerce").dt.strftime("%Y-%m").fillna("")
         tmp.to_csv(outp, index=False, encoding="utf-8")
         print(f"[AUDIT] wrote: {outp.resolve()}")
 
-    # companies
-    if args.companies:
-        companies = [c.strip() for c in args.companies.split(",") if c.strip()]
-    else:
+    # companies（列名だけで決まらなかったときは値を見て判定）
+    if companies is None:
         companies = detect_company_cols_by_layout(df, date_col=date_col)
     if not companies:
         raise SystemExit("[ERROR] 企業列が検出できません。--companies で明示してください。")
@@ -12,14 +12,97 @@ null_report.csv（縦持ち: company, total_rows, column, null_count, null_pct
 
   # null_count を表にする
   python null_report_pivot.py --input null_report.csv --output null_report_table.csv --value null_count
+
+依存:
+  pip install pandas
+  (任意) pip install "polars>=1.0"  # 大きな入力の高速化
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
 from pathlib import Path
-from typing import Dict, List, Set
+
+import pandas as pd
+
+
+REQUIRED_COLUMNS = {"company", "total_rows", "column", "null_count", "null_pct"}
+
+
+def _pivot_with_polars(
+    pl,
+    input_path: Path,
+    output_path: Path,
+    value_field: str,
+    include_total_rows: bool,
+) -> None:
+    # 全列を文字列として遅延スキャン（数値の書式を入力どおりに保つ）
+    lf = pl.scan_csv(input_path, infer_schema=False)
+    if not REQUIRED_COLUMNS.issubset(set(lf.collect_schema().names())):
+        raise ValueError(f"input CSV must have columns: {sorted(REQUIRED_COLUMNS)}")
+
+    df = (
+        lf.select([
+            pl.col(c).fill_null("").str.strip_chars()
+            for c in ("company", "total_rows", "column", value_field)
+        ])
+        # 変な行はスキップ（必要ならここでraiseに変更可）
+        .filter((pl.col("company") != "") & (pl.col("column") != ""))
+        .collect()
+    )
+
+    # company / 列名とも出現順、同じ (company, column) は後勝ち、欠損は空欄
+    out = df.pivot(on="column", index="company", values=value_field, aggregate_function="last")
+
+    if include_total_rows:
+        # company ごとに最初の非空 total_rows
+        tr = (
+            df.filter(pl.col("total_rows") != "")
+            .group_by("company", maintain_order=True)
+            .agg(pl.col("total_rows").first())
+        )
+        out = out.join(tr, on="company", how="left", maintain_order="left")
+        out = out.select(["company", "total_rows", *[c for c in out.columns if c not in ("company", "total_rows")]])
+
+    # 空文字も欠損と同じく無引用の空欄で出す
+    out = out.with_columns(pl.exclude("company").replace("", None))
+    out.write_csv(output_path, null_value="")
+
+
+def _pivot_with_pandas(
+    input_path: Path,
+    output_path: Path,
+    value_field: str,
+    include_total_rows: bool,
+) -> None:
+    # 値は文字列のまま扱う（数値の書式を入力どおりに保つ）
+    df = pd.read_csv(input_path, encoding="utf-8", dtype=str, keep_default_na=False)
+    if not REQUIRED_COLUMNS.issubset(set(df.columns)):
+        raise ValueError(f"input CSV must have columns: {sorted(REQUIRED_COLUMNS)}")
+
+    df = df[["company", "total_rows", "column", value_field]].apply(lambda s: s.str.strip())
+    # 変な行はスキップ（必要ならここでraiseに変更可）
+    df = df[(df["company"] != "") & (df["column"] != "")]
+
+    # company / 列名（"column"フィールド）とも入力の出現順を保つ
+    company_order = df["company"].drop_duplicates().tolist()
+    col_order = df["column"].drop_duplicates().tolist()
+
+    # 同じ (company, column) が複数あれば後勝ち
+    cells = df.drop_duplicates(subset=["company", "column"], keep="last")
+    out = (
+        cells.pivot(index="company", columns="column", values=value_field)
+        .reindex(index=company_order, columns=col_order)
+        .fillna("")  # 欠損は空欄
+    )
+    out.columns.name = None
+
+    if include_total_rows:
+        # company ごとに最初の非空 total_rows
+        tr = df[df["total_rows"] != ""].groupby("company", sort=False)["total_rows"].first()
+        out.insert(0, "total_rows", tr.reindex(company_order).fillna(""))
+
+    out.to_csv(output_path, encoding="utf-8", lineterminator="\n")
 
 
 def pivot_null_report(
@@ -30,64 +113,23 @@ def pivot_null_report(
 ) -> None:
     """
     company を行、"column" を列、value_field をセル値にしてCSV出力。
+    polars 1.0 以降があれば polars（遅延スキャン + pivot）、無ければ pandas で処理する。
     """
     if value_field not in ("null_pct", "null_count"):
         raise ValueError('value_field must be "null_pct" or "null_count"')
 
-    # company -> {colname -> value}
-    table: Dict[str, Dict[str, str]] = {}
-    # company -> total_rows (文字列のまま保持)
-    total_rows_map: Dict[str, str] = {}
-
-    # 列名（"column"フィールド）の出現順を保つ
-    col_order: List[str] = []
-    col_seen: Set[str] = set()
-
-    with input_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        required = {"company", "total_rows", "column", "null_count", "null_pct"}
-        if reader.fieldnames is None or not required.issubset(set(reader.fieldnames)):
-            raise ValueError(f"input CSV must have columns: {sorted(required)}")
-
-        for row in reader:
-            company = (row.get("company") or "").strip()
-            colname = (row.get("column") or "").strip()
-            val = (row.get(value_field) or "").strip()
-            tr = (row.get("total_rows") or "").strip()
-
-            if company == "" or colname == "":
-                # 変な行はスキップ（必要ならここでraiseに変更可）
-                continue
-
-            if colname not in col_seen:
-                col_seen.add(colname)
-                col_order.append(colname)
-
-            table.setdefault(company, {})[colname] = val
-            if company not in total_rows_map and tr != "":
-                total_rows_map[company] = tr
-
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # ヘッダ
-    header = ["company"]
-    if include_total_rows:
-        header.append("total_rows")
-    header.extend(col_order)
-
-    # company順は入力出現順にしたいなら別途保持も可能だが、
-    # ここでは読み込んだdict順(=挿入順)で出力する
-    with output_path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f, lineterminator="\n")
-        writer.writerow(header)
-
-        for company, rowmap in table.items():
-            out_row = [company]
-            if include_total_rows:
-                out_row.append(total_rows_map.get(company, ""))
-            for colname in col_order:
-                out_row.append(rowmap.get(colname, ""))  # 欠損は空欄
-            writer.writerow(out_row)
+    try:
+        import polars as pl
+    except ImportError:
+        pl = None
+
+    # polars 側は 1.0 以降の API（infer_schema / pivot(on=) / join(maintain_order=)）を使う
+    if pl is not None and int(pl.__version__.split(".")[0]) >= 1:
+        _pivot_with_polars(pl, input_path, output_path, value_field, include_total_rows)
+    else:
+        _pivot_with_pandas(input_path, output_path, value_field, include_total_rows)
 
 
 def main() -> int:
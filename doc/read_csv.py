@@ -31,6 +31,9 @@ import sys
 from pathlib import Path
 from typing import Optional, Tuple
 
+# この行数以上を取り出すときだけ pyarrow を使う（少量なら import コストの方が大きい）
+_ARROW_MIN_ROWS = 10_000
+
 
 def _read_sample_bytes(path: Path, size: int = 4096) -> bytes:
     with path.open("rb") as f:
@@ -39,7 +42,7 @@ def _read_sample_bytes(path: Path, size: int = 4096) -> bytes:
 
 def _guess_encoding(path: Path) -> str:
     """
-    よくある順に試す（日本語環境・Excel出力を想定）
+    BOM があればそれに従い、無ければよくある順に試す（日本語環境・Excel出力を想定）
     - utf-8-sig
     - utf-8
     - cp932
@@ -48,6 +51,12 @@ def _guess_encoding(path: Path) -> str:
     candidates = ["utf-8-sig", "utf-8", "cp932", "shift_jis"]
     data = _read_sample_bytes(path, 8192)
 
+    # BOM があれば確定（Excel出力の典型ケース）。デコード試行は不要
+    if data.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+
     for enc in candidates:
         try:
             data.decode(enc)
@@ -89,6 +98,74 @@ def _prepare_stdout_utf8() -> None:
         pass
 
 
+def _read_first_rows_arrow(
+    input_path: Path,
+    n_total_rows: int,
+    encoding: str,
+    dialect: csv.Dialect,
+) -> Optional[list[list[str]]]:
+    """
+    pyarrow の CSV リーダで先頭n_total_rows行を返す（ヘッダ含めてn行）。
+    全列を文字列として読むので値は csv.reader と同じ形になる。
+    pyarrow が無い / arrow で読めない形（列数不揃いなど）/ 空行を含むかもしれないときは None。
+    """
+    if dialect.skipinitialspace:
+        return None
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None
+
+    # 列数はヘッダ行から決める（列名を与えるとヘッダ行もデータとして返る）
+    with input_path.open("r", encoding=encoding, newline="") as f:
+        header = next(csv.reader(f, dialect=dialect), None)
+    if not header:
+        return None
+    names = [f"f{i}" for i in range(len(header))]
+
+    read_options = pacsv.ReadOptions(encoding=encoding, block_size=1 << 20, column_names=names)
+    parse_options = pacsv.ParseOptions(
+        delimiter=dialect.delimiter,
+        quote_char=dialect.quotechar or False,
+        double_quote=dialect.doublequote,
+        escape_char=dialect.escapechar or False,
+        newlines_in_values=True,
+        ignore_empty_lines=False,
+    )
+    convert_options = pacsv.ConvertOptions(
+        column_types={n: pa.string() for n in names},
+        strings_can_be_null=False,
+        quoted_strings_can_be_null=False,
+    )
+
+    try:
+        reader = pacsv.open_csv(
+            str(input_path),
+            read_options=read_options,
+            parse_options=parse_options,
+            convert_options=convert_options,
+        )
+        batches = []
+        n_read = 0
+        for batch in reader:
+            batches.append(batch)
+            n_read += batch.num_rows
+            if n_read >= n_total_rows:
+                break
+    except (pa.ArrowInvalid, UnicodeDecodeError):
+        return None
+
+    table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, n_total_rows)
+    columns = [c.to_pylist() for c in table.columns]
+    rows = [list(row) for row in zip(*columns)]
+    # 空行は csv.reader だと []、arrow だと空文字だけの行になり、",," の行と区別できない。
+    # 空文字だけの行があれば csv.reader に任せる
+    if any(not any(row) for row in rows):
+        return None
+    return rows
+
+
 def _read_first_rows(
     input_path: Path,
     n_total_rows: int,
@@ -97,7 +174,13 @@ def _read_first_rows(
 ) -> list[list[str]]:
     """
     CSVとして先頭n_total_rows行を返す（ヘッダ含めてn行）。
+    行数が多いときは pyarrow があればそちらで読む。
     """
+    if n_total_rows >= _ARROW_MIN_ROWS:
+        rows_arrow = _read_first_rows_arrow(input_path, n_total_rows, encoding, dialect)
+        if rows_arrow is not None:
+            return rows_arrow
+
     rows: list[list[str]] = []
     with input_path.open("r", encoding=encoding, newline="") as f:
         reader = csv.reader(f, dialect=dialect)
@@ -110,9 +193,12 @@ def _read_first_rows(
 
 def _write_rows_to_stdout(rows: list[list[str]], dialect: csv.Dialect) -> None:
     _prepare_stdout_utf8()
-    writer = csv.writer(sys.stdout, dialect=dialect, lineterminator=os.linesep)
-    for row in rows:
-        writer.writerow(row)
+    # 行ごとに stdout へ書くと（特にWindowsのコンソールで）遅いので、まとめて1回で書く
+    buf = io.StringIO()
+    writer = csv.writer(buf, dialect=dialect, lineterminator=os.linesep)
+    writer.writerows(rows)
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
 
 
 def _write_rows_to_file(
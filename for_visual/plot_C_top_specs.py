@@ -1,61 +1,67 @@
 """C: TopSpec時系列 — 棒グラフ"""
-import csv, sys
+import sys
 from pathlib import Path
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from collections import defaultdict
+import pandas as pd
 
-CSV = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("example_ana/out/C_top_specs.csv")
+DEFAULT_CSV = Path("example_ana/out/C_top_specs.csv")
 OUT = Path("for_visual/png")
-OUT.mkdir(parents=True, exist_ok=True)
-
-rows = []
-with open(CSV, encoding="utf-8-sig") as f:
-    reader = csv.DictReader(f)
-    for r in reader:
-        rows.append(r)
-
-# ALL 国、全期間合算で TGPP_NUMBER 別件数
-spec_total = defaultdict(int)
-for r in rows:
-    if r["country"] == "ALL":
-        spec_total[r["TGPP_NUMBER"]] += int(r["cnt"])
-
-top10 = sorted(spec_total, key=lambda s: -spec_total[s])[:10]
-
-# --- 1) Top10 Spec 棒グラフ ---
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.barh(list(reversed(top10)), [spec_total[s] for s in reversed(top10)], color="#55A868")
-ax.set_title("Top 10 3GPP Specs by Total Count (C: ts_top_specs)", fontsize=13)
-ax.set_xlabel("Total Count")
-plt.tight_layout()
-plt.savefig(OUT / "C_top10_specs_bar.png", dpi=150)
-plt.close()
-print(f"  saved: C_top10_specs_bar.png")
-
-# --- 2) Top5 Spec の年次推移 ---
-top5 = top10[:5]
-spec_yearly = defaultdict(lambda: defaultdict(int))
-for r in rows:
-    if r["country"] == "ALL" and r["TGPP_NUMBER"] in top5:
-        year = r["bucket"][:4]
-        if year >= "2005":
-            spec_yearly[r["TGPP_NUMBER"]][year] += int(r["cnt"])
-
-years = sorted(set(y for s in spec_yearly.values() for y in s.keys()))
-fig, ax = plt.subplots(figsize=(14, 6))
-for spec in top5:
-    vals = [spec_yearly[spec].get(y, 0) for y in years]
-    ax.plot(years, vals, "o-", label=spec, linewidth=1.5)
-ax.set_title("Top 5 Specs Yearly Trend (C: ts_top_specs)", fontsize=13)
-ax.set_xlabel("Year")
-ax.set_ylabel("Count")
-ax.legend(fontsize=9)
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUT / "C_top5_specs_trend.png", dpi=150)
-plt.close()
-print(f"  saved: C_top5_specs_trend.png")
-
-print("C plots done.")
+
+
+def main(csv_path=DEFAULT_CSV):
+    OUT.mkdir(parents=True, exist_ok=True)
+
+    # TGPP_NUMBER / bucket は文字列のまま読む（"38.000" 等を数値化しない）
+    # country は種類が少ないので category（値ごとに文字列を1つだけ持つ）
+    df = pd.read_csv(csv_path, encoding="utf-8-sig", keep_default_na=False,
+                     dtype={"country": "category", "TGPP_NUMBER": str, "bucket": str})
+
+    # ALL 国、全期間合算で TGPP_NUMBER 別件数
+    all_df = df[df["country"] == "ALL"]
+    spec_total = all_df.groupby("TGPP_NUMBER", sort=False)["cnt"].sum()
+
+    top10 = spec_total.sort_values(ascending=False, kind="stable").head(10).index.tolist()
+
+    # --- 1) Top10 Spec 棒グラフ ---
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(top10[::-1], spec_total.loc[top10[::-1]].to_numpy(), color="#55A868")
+    ax.set_title("Top 10 3GPP Specs by Total Count (C: ts_top_specs)", fontsize=13)
+    ax.set_xlabel("Total Count")
+    plt.tight_layout()
+    plt.savefig(OUT / "C_top10_specs_bar.png", dpi=150)
+    plt.close()
+    print(f"  saved: C_top10_specs_bar.png")
+
+    # --- 2) Top5 Spec の年次推移 ---
+    top5 = top10[:5]
+    sub = all_df[all_df["TGPP_NUMBER"].isin(top5)]
+    year = sub["bucket"].str[:4]
+    sub, year = sub[year >= "2005"], year[year >= "2005"]
+    spec_yearly = (
+        sub.groupby(["TGPP_NUMBER", year])["cnt"].sum()
+        .unstack(fill_value=0)
+        .reindex(index=top5, fill_value=0)
+    )
+
+    years = sorted(spec_yearly.columns)
+    fig, ax = plt.subplots(figsize=(14, 6))
+    for spec in top5:
+        vals = spec_yearly.loc[spec, years].to_numpy()
+        ax.plot(years, vals, "o-", label=spec, linewidth=1.5)
+    ax.set_title("Top 5 Specs Yearly Trend (C: ts_top_specs)", fontsize=13)
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Count")
+    ax.legend(fontsize=9)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(OUT / "C_top5_specs_trend.png", dpi=150)
+    plt.close()
+    print(f"  saved: C_top5_specs_trend.png")
+
+    print("C plots done.")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CSV)
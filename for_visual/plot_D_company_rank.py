@@ -1,53 +1,62 @@
 """D: 企業ランキング — 横棒グラフ + 国別比較"""
-import csv, sys
+import sys
 from pathlib import Path
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from collections import defaultdict
+import pandas as pd
 
-CSV = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("example_ana/out/D_company_rank.csv")
+DEFAULT_CSV = Path("example_ana/out/D_company_rank.csv")
 OUT = Path("for_visual/png")
-OUT.mkdir(parents=True, exist_ok=True)
-
-rows = []
-with open(CSV, encoding="utf-8-sig") as f:
-    reader = csv.DictReader(f)
-    for r in reader:
-        rows.append(r)
-
-# --- 1) ALL 国 企業 Top20 ---
-all_rows = [r for r in rows if r["country"] == "ALL"]
-all_rows.sort(key=lambda r: -int(r["cnt"]))
-top20 = all_rows[:20]
-
-fig, ax = plt.subplots(figsize=(12, 8))
-names = [r["company"][:30] for r in reversed(top20)]
-vals = [int(r["cnt"]) for r in reversed(top20)]
-ax.barh(names, vals, color="#DD8452")
-ax.set_title("Top 20 Companies by Filing Count (D: rank_company_counts)", fontsize=13)
-ax.set_xlabel("Distinct Application Count")
-plt.tight_layout()
-plt.savefig(OUT / "D_top20_companies.png", dpi=150)
-plt.close()
-print(f"  saved: D_top20_companies.png")
-
-# --- 2) 国別 Top5 比較 ---
-countries = ["JP", "US", "CN", "EP", "KR"]
-fig, axes = plt.subplots(1, len(countries), figsize=(20, 6), sharey=False)
-for i, ctry in enumerate(countries):
-    ctry_rows = [r for r in rows if r["country"] == ctry]
-    ctry_rows.sort(key=lambda r: -int(r["cnt"]))
-    top5 = ctry_rows[:5]
-    names = [r["company"][:20] for r in reversed(top5)]
-    vals = [int(r["cnt"]) for r in reversed(top5)]
-    axes[i].barh(names, vals, color="#4C72B0")
-    axes[i].set_title(f"{ctry}", fontsize=12)
-    axes[i].tick_params(axis="y", labelsize=8)
-plt.suptitle("Top 5 Companies by Country (D)", fontsize=14)
-plt.tight_layout()
-plt.savefig(OUT / "D_top5_by_country.png", dpi=150)
-plt.close()
-print(f"  saved: D_top5_by_country.png")
-
-print("D plots done.")
+
+
+def main(csv_path=DEFAULT_CSV):
+    OUT.mkdir(parents=True, exist_ok=True)
+
+    # company は文字列のまま読む（"NA" 等を欠損扱いしない）
+    # country は種類が少ないので category（値ごとに文字列を1つだけ持つ）
+    df = pd.read_csv(csv_path, encoding="utf-8-sig", keep_default_na=False,
+                     dtype={"country": "category", "company": str})
+
+    # --- 1) ALL 国 企業 Top20 ---
+    top20 = df[df["country"] == "ALL"].sort_values("cnt", ascending=False, kind="stable").head(20)
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    names = top20["company"].str[:30].tolist()[::-1]
+    vals = top20["cnt"].to_numpy()[::-1]
+    ax.barh(names, vals, color="#DD8452")
+    ax.set_title("Top 20 Companies by Filing Count (D: rank_company_counts)", fontsize=13)
+    ax.set_xlabel("Distinct Application Count")
+    plt.tight_layout()
+    plt.savefig(OUT / "D_top20_companies.png", dpi=150)
+    plt.close()
+    print(f"  saved: D_top20_companies.png")
+
+    # --- 2) 国別 Top5 比較 ---
+    countries = ["JP", "US", "CN", "EP", "KR"]
+    # 対象国をまとめて1回ソートし、国ごとの上位5件を groupby.head で取る
+    top5_by_ctry = (
+        df[df["country"].isin(countries)]
+        .sort_values("cnt", ascending=False, kind="stable")
+        .groupby("country", observed=True, sort=False)
+        .head(5)
+    )
+    fig, axes = plt.subplots(1, len(countries), figsize=(20, 6), sharey=False)
+    for i, ctry in enumerate(countries):
+        top5 = top5_by_ctry[top5_by_ctry["country"] == ctry]
+        names = top5["company"].str[:20].tolist()[::-1]
+        vals = top5["cnt"].to_numpy()[::-1]
+        axes[i].barh(names, vals, color="#4C72B0")
+        axes[i].set_title(f"{ctry}", fontsize=12)
+        axes[i].tick_params(axis="y", labelsize=8)
+    plt.suptitle("Top 5 Companies by Country (D)", fontsize=14)
+    plt.tight_layout()
+    plt.savefig(OUT / "D_top5_by_country.png", dpi=150)
+    plt.close()
+    print(f"  saved: D_top5_by_country.png")
+
+    print("D plots done.")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CSV)
@@ -0,0 +1,34 @@
+"""A〜E の可視化をまとめて実行 — スクリプトごとに別プロセスで並列に描く"""
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import plot_A_filing_ts
+import plot_B_lag_stats
+import plot_C_top_specs
+import plot_D_company_rank
+import plot_E_heatmap
+
+IN_DIR = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("example_ana/out")
+
+# (描画関数, 入力CSVファイル名)
+JOBS = [
+    (plot_A_filing_ts.main, plot_A_filing_ts.DEFAULT_CSV.name),
+    (plot_B_lag_stats.main, plot_B_lag_stats.DEFAULT_CSV.name),
+    (plot_C_top_specs.main, plot_C_top_specs.DEFAULT_CSV.name),
+    (plot_D_company_rank.main, plot_D_company_rank.DEFAULT_CSV.name),
+    (plot_E_heatmap.main, plot_E_heatmap.DEFAULT_CSV.name),
+]
+
+
+def main():
+    # matplotlib の import / Agg 初期化は各ワーカーで1回だけ
+    with ProcessPoolExecutor(max_workers=len(JOBS)) as ex:
+        futures = [ex.submit(fn, IN_DIR / name) for fn, name in JOBS]
+        for fut in futures:
+            fut.result()  # どれかが失敗したらここで例外を上げる
+    print("all plots done.")
+
+
+if __name__ == "__main__":
+    main()
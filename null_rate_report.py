@@ -21,6 +21,7 @@ import argparse
 import csv
 import sqlite3
 import sys
+from datetime import date
 from pathlib import Path
 
 
@@ -42,6 +43,25 @@ COMPANY_PATTERNS = {
     "ZTE": "%ZTE%",
 }
 
+# --companies のキーワード照合用（名前・パターンを大文字化したものを1回だけ作る）
+COMPANY_PATTERNS_UPPER = [(name, pat, name.upper(), pat.upper()) for name, pat in COMPANY_PATTERNS.items()]
+
+# PBPA_APP_DATE のインデックス（パイプラインの create_indexes_sql で作られる名前）
+DATE_INDEX = "idx_isld_pure_PBPA_APP_DATE"
+# 期間がこの日数以下のときだけ日付インデックスを強制する（広い期間は全件スキャンの方が速い）
+DATE_INDEX_MAX_SPAN_DAYS = 366
+
+# 一致ビットマスクに載せるパターン数の上限（SQLite の整数は 64bit 符号付き）
+MAX_MASK_BITS = 62
+
+
+def span_days(date_from, date_to):
+    """YYYY-MM-DD の期間の日数。日付として読めなければ無限大（インデックスは強制しない）"""
+    try:
+        return (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days
+    except ValueError:
+        return float("inf")
+
 
 def main():
     parser = argparse.ArgumentParser(description="null率レポート")
@@ -57,10 +77,18 @@ def main():
     args = parser.parse_args()
 
     conn = sqlite3.connect(args.db)
-    conn.execute("PRAGMA cache_size=-128000;")
-
-    all_cols = [r[1] for r in conn.execute("PRAGMA table_info(isld_pure)").fetchall()]
+    # 読み取り専用の大きなスキャン向け PRAGMA
+    # （スキャンは1回だけなので page cache は既定のまま。大きくすると GROUP BY のソートがその分メモリに載る）
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA mmap_size=268435456;")  # 256 MB
+    conn.execute("PRAGMA query_only=1;")
+
+    table_info = conn.execute("PRAGMA table_info(isld_pure)").fetchall()
+    all_cols = [r[1] for r in table_info]
     target_cols = args.columns if args.columns else all_cols
+    # NOT NULL 制約のある列は NULL 数が必ず 0 なので SQL では数えない
+    not_null_cols = {r[1] for r in table_info if r[3]}
+    count_cols = [c for c in target_cols if c not in not_null_cols]
 
     # WHERE 構築
     base_where = "1=1"
@@ -75,67 +103,92 @@ def main():
         base_where += " AND PBPA_APP_DATE <= ?"
         base_params.append(args.date_to)
 
+    # 期間が両端とも指定されていて短いときだけ日付インデックスの範囲検索を強制（インデックスがある DB のみ）
+    from_clause = "isld_pure"
+    if args.date_from and args.date_to and span_days(args.date_from, args.date_to) <= DATE_INDEX_MAX_SPAN_DAYS:
+        index_names = {r[1] for r in conn.execute("PRAGMA index_list(isld_pure)")}
+        if DATE_INDEX in index_names:
+            from_clause += f" INDEXED BY {DATE_INDEX}"
+
     # 企業リスト
     if args.companies:
         company_filters = {}
         for c in args.companies:
             # 既知パターンマッチ
-            matched = False
-            for name, pat in COMPANY_PATTERNS.items():
-                if c.upper() in name.upper() or c.upper() in pat.upper():
-                    company_filters[name] = pat
-                    matched = True
-                    break
-            if not matched:
+            cu = c.upper()
+            hit = next(((name, pat) for name, pat, nu, pu in COMPANY_PATTERNS_UPPER if cu in nu or cu in pu), None)
+            if hit:
+                company_filters[hit[0]] = hit[1]
+            else:
                 company_filters[c] = f"%{c}%"
     else:
         company_filters = {"ALL": None}
         company_filters.update(COMPANY_PATTERNS)
 
-    results = []
-
-    for comp_name, comp_pat in company_filters.items():
-        where = base_where
-        params = list(base_params)
-        if comp_pat:
-            where += " AND UPPER(COMP_LEGAL_NAME) LIKE UPPER(?)"
-            params.append(comp_pat)
-
-        # 1クエリで全列のNULL数を取得
-        null_exprs = ", ".join(
-            [f"COUNT(*)"] +
-            [f"SUM(CASE WHEN [{c}] IS NULL THEN 1 ELSE 0 END)" for c in target_cols]
+    # 行ごとに企業パターンを1回ずつ LIKE で照合し、一致した企業のビットを立てたマスクで GROUP BY する。
+    # グループ数は一致パターンの組合せ数（社名の種類以下）しかないので、企業への振り分けは Python で足し込む
+    # （COUNT(列) は値を読まずにレコードヘッダだけで NULL を判定できる。NULL数 = 件数 - 非NULL数）
+    n_values = 1 + len(count_cols)
+    count_exprs = "".join(f", COUNT([{c}])" for c in count_cols)
+    pattern_items = [(name, pat) for name, pat in company_filters.items() if pat]
+
+    def fold(groups):
+        return [sum(v) for v in zip(*groups)] if groups else [0] * n_values
+
+    counts_by_company = {}
+    # パターンが MAX_MASK_BITS を超えるときだけ、分けてスキャンする
+    for start in range(0, max(len(pattern_items), 1), MAX_MASK_BITS):
+        batch = pattern_items[start:start + MAX_MASK_BITS]
+        # LIKE は ASCII の大文字小文字を区別しないので、社名側もパターン側も UPPER は不要
+        mask_expr = " | ".join(f"((COMP_LEGAL_NAME LIKE ?) << {i})" for i in range(len(batch))) or "0"
+        sql = (
+            f"SELECT {mask_expr} AS mask, COUNT(*){count_exprs} "
+            f"FROM {from_clause} WHERE {base_where} GROUP BY mask"
         )
-        row = conn.execute(f"SELECT {null_exprs} FROM isld_pure WHERE {where}", params).fetchone()
-        total = row[0]
-
-        for i, col in enumerate(target_cols):
-            null_count = row[i + 1]
-            pct = null_count / total * 100 if total > 0 else 0
-            results.append({
-                "company": comp_name,
-                "total_rows": total,
-                "column": col,
-                "null_count": null_count,
-                "null_pct": round(pct, 2),
-            })
-
-    # 出力
-    if args.out:
-        with open(args.out, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=["company", "total_rows", "column", "null_count", "null_pct"])
-            w.writeheader()
-            w.writerows(results)
-        print(f"出力: {args.out} ({len(results)} 行)", file=sys.stderr)
-    else:
-        current_comp = None
-        for r in results:
-            if r["company"] != current_comp:
-                current_comp = r["company"]
+        params = [pat for _, pat in batch] + base_params
+        # 社名が NULL の行はマスクも NULL（どの企業にも一致しない）
+        groups = [(mask or 0, values) for mask, *values in conn.execute(sql, params)]
+        if start == 0 and "ALL" in company_filters:
+            counts_by_company["ALL"] = fold([values for _, values in groups])
+        for i, (comp_name, _) in enumerate(batch):
+            counts_by_company[comp_name] = fold([values for mask, values in groups if mask >> i & 1])
+
+    # 出力（企業ごとに CSV / 画面へ順に書き出す）
+    out_f = open(args.out, "w", newline="", encoding="utf-8") if args.out else None
+    w = None
+    if out_f is not None:
+        w = csv.DictWriter(out_f, fieldnames=["company", "total_rows", "column", "null_count", "null_pct"])
+        w.writeheader()
+    n_out = 0
+
+    try:
+        for comp_name in company_filters:
+            total, *nonnull_counts = counts_by_company[comp_name]
+            nonnull_by_col = dict(zip(count_cols, nonnull_counts))
+            if w is None:
                 print(f"\n{'='*60}", flush=True)
-                print(f"  {current_comp}  (n={r['total_rows']:,})", flush=True)
+                print(f"  {comp_name}  (n={total:,})", flush=True)
                 print(f"{'='*60}", flush=True)
-            print(f"  {r['column']:35s}  NULL={r['null_count']:>10,}  ({r['null_pct']:5.1f}%)", flush=True)
+            for col in target_cols:
+                null_count = total - nonnull_by_col.get(col, total)
+                pct = null_count / total * 100 if total > 0 else 0
+                if w is not None:
+                    w.writerow({
+                        "company": comp_name,
+                        "total_rows": total,
+                        "column": col,
+                        "null_count": null_count,
+                        "null_pct": round(pct, 2),
+                    })
+                else:
+                    print(f"  {col:35s}  NULL={null_count:>10,}  ({round(pct, 2):5.1f}%)", flush=True)
+                n_out += 1
+    finally:
+        if out_f is not None:
+            out_f.close()
+
+    if args.out:
+        print(f"出力: {args.out} ({n_out} 行)", file=sys.stderr)
 
     conn.close()
 